@@ -0,0 +1,102 @@
+"""Fused kernel for the dynamic rerank-skip decision.
+
+The percentile analysis in ``MatchingPipeline._should_skip_reranker`` runs on
+every query, so the numeric conditions live here as one function over the
+descending-sorted score array. With numba installed the function is
+JIT-compiled (``cache=True`` amortizes the first-call compile across runs);
+otherwise a NumPy implementation with identical semantics is used.
+
+The kernel returns ``(should_skip, reason_code)``; the pipeline maps codes to
+human-readable notes. Code 1 (too few candidates) is decided by the caller
+before the score array is built.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Reason codes for the skip decision
+NO_SKIP = 0
+TOO_FEW = 1
+PERCENTILE = 2
+GAP = 3
+CLUSTER = 4
+DOMINANCE = 5
+
+
+def _should_skip_numpy(scores, target_k, min_pct, gap_threshold, cluster_sep,
+                       top_pct, topk_min_pct):
+    """NumPy fallback mirroring the njit kernel."""
+    n = scores.shape[0]
+
+    # Condition 2: all top-k at or above the min_pct-th percentile.
+    # scores is sorted descending, so scores[target_k - 1] is the top-k min.
+    p_threshold = scores[int((100.0 - min_pct) / 100.0 * (n - 1))]
+    if scores[target_k - 1] >= p_threshold:
+        return True, PERCENTILE
+
+    # Condition 3: percentile-rank gap between the k-th and (k+1)-th score,
+    # O(log n) via searchsorted on the ascending view instead of counting
+    # each score
+    asc = scores[::-1]
+    p5_rank = np.searchsorted(asc, scores[target_k - 1], side='right') / n * 100.0
+    p6_rank = np.searchsorted(asc, scores[target_k], side='right') / n * 100.0
+    if p5_rank - p6_rank >= gap_threshold:
+        return True, GAP
+
+    # Condition 4: cluster separation between top-k mean and the rest
+    if scores[target_k:].mean() + cluster_sep < scores[:target_k].mean():
+        return True, CLUSTER
+
+    # Condition 5: top dominance
+    p95 = scores[int((100.0 - top_pct) / 100.0 * (n - 1))]
+    p85 = scores[int((100.0 - topk_min_pct) / 100.0 * (n - 1))]
+    if scores[0] >= p95 and scores[target_k - 1] >= p85:
+        return True, DOMINANCE
+
+    return False, NO_SKIP
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def should_skip(scores, target_k, min_pct, gap_threshold, cluster_sep,
+                    top_pct, topk_min_pct):
+        """Fused skip decision over descending-sorted scores; one C-level pass."""
+        n = scores.shape[0]
+
+        # Condition 2: all top-k at or above the min_pct-th percentile
+        p_threshold = scores[int((100.0 - min_pct) / 100.0 * (n - 1))]
+        if scores[target_k - 1] >= p_threshold:
+            return True, PERCENTILE
+
+        # Condition 3: percentile-rank gap, O(log n) via searchsorted on the
+        # ascending view instead of counting each score
+        asc = scores[::-1]
+        p5_rank = np.searchsorted(asc, scores[target_k - 1], side='right') / n * 100.0
+        p6_rank = np.searchsorted(asc, scores[target_k], side='right') / n * 100.0
+        if p5_rank - p6_rank >= gap_threshold:
+            return True, GAP
+
+        # Condition 4: cluster separation between top-k mean and the rest
+        top_mean = 0.0
+        for i in range(target_k):
+            top_mean += scores[i]
+        top_mean /= target_k
+        rest_mean = 0.0
+        for i in range(target_k, n):
+            rest_mean += scores[i]
+        rest_mean /= (n - target_k)
+        if top_mean - rest_mean > cluster_sep:
+            return True, CLUSTER
+
+        # Condition 5: top dominance
+        p95 = scores[int((100.0 - top_pct) / 100.0 * (n - 1))]
+        p85 = scores[int((100.0 - topk_min_pct) / 100.0 * (n - 1))]
+        if scores[0] >= p95 and scores[target_k - 1] >= p85:
+            return True, DOMINANCE
+
+        return False, NO_SKIP
+else:
+    should_skip = _should_skip_numpy
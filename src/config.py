@@ -92,6 +92,7 @@ class Config:
     fine_tuning: Dict[str, Any]
     top_k_results: int
     min_score_threshold: float
+    vector_good_threshold: float
     dynamic_reranking: DynamicRerankingConfig
 
 
@@ -149,6 +150,7 @@ def load_config(config_path: str = "config.yaml") -> Config:
         fine_tuning=config_dict['fine_tuning'],
         top_k_results=config_dict.get('top_k_results', 5),
         min_score_threshold=config_dict.get('min_score_threshold', 0.0),
+        vector_good_threshold=config_dict.get('vector_good_threshold', 0.65),
         dynamic_reranking=DynamicRerankingConfig(
             enabled=config_dict.get('dynamic_reranking', {}).get('enabled', False),
             target_top_k=config_dict.get('dynamic_reranking', {}).get('target_top_k', 5),
@@ -3,7 +3,7 @@ import psycopg2
 from psycopg2.extras import execute_values
 from psycopg2.extensions import register_adapter, AsIs
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass
 import json
 
@@ -340,14 +340,8 @@ class Database:
                 usage_count=row[8]
             )
     
-    def vector_search(self, query_embedding: np.ndarray, limit: int, ef_search: int) -> List[Tuple[int, float, Dict[str, Any]]]:
-        """Perform vector similarity search on individual BDD steps."""
-        with self.conn.cursor() as cur:
-            # Set ef_search parameter
-            cur.execute(f"SET LOCAL hnsw.ef_search = {ef_search};")
-            
-            # Search individual steps and join with parent scenario
-            cur.execute("""
+    # Shared by vector_search and vector_search_iter
+    _VECTOR_SEARCH_SQL = """
                 SELECT 
                     bis.id,
                     bis.feature_step_id,
@@ -368,35 +362,72 @@ class Database:
                 JOIN {feature_steps} fs ON bis.feature_step_id = fs.id
                 ORDER BY bis.embedding <=> %s::vector
                 LIMIT %s;
-            """.format(individual_steps=self.table_individual_steps, feature_steps=self.table_feature_steps), (query_embedding.tolist(), query_embedding.tolist(), limit))
+            """
+
+    @staticmethod
+    def _step_search_row(row) -> Tuple[int, float, Dict[str, Any]]:
+        """Convert one vector search row to an (id, similarity, dict) tuple."""
+        return (
+            row[0],  # individual step id
+            row[14],  # similarity
+            {
+                "id": row[0],  # individual step id
+                "feature_step_id": row[1],
+                "step_type": row[2],
+                "step_text": row[3],
+                "step_text_normalized": row[4],
+                "step_index": row[5],
+                "usage_count": row[6],
+                # Full scenario context
+                "scenario_id": row[7],
+                "scenario_testcase_id": row[8],
+                "scenario_full_text": row[9],
+                "scenario_name": row[10],
+                "scenario_given_steps": row[11],
+                "scenario_when_steps": row[12],
+                "scenario_then_steps": row[13],
+                # For backwards compatibility
+                "normalized_text": row[4],
+                "bdd_step": row[9]  # Full scenario text
+            }
+        )
+
+    def vector_search(self, query_embedding: np.ndarray, limit: int, ef_search: int) -> List[Tuple[int, float, Dict[str, Any]]]:
+        """Perform vector similarity search on individual BDD steps."""
+        with self.conn.cursor() as cur:
+            # Set ef_search parameter
+            cur.execute(f"SET LOCAL hnsw.ef_search = {ef_search};")
             
-            results = []
-            for row in cur.fetchall():
-                results.append((
-                    row[0],  # individual step id
-                    row[14],  # similarity
-                    {
-                        "id": row[0],  # individual step id
-                        "feature_step_id": row[1],
-                        "step_type": row[2],
-                        "step_text": row[3],
-                        "step_text_normalized": row[4],
-                        "step_index": row[5],
-                        "usage_count": row[6],
-                        # Full scenario context
-                        "scenario_id": row[7],
-                        "scenario_testcase_id": row[8],
-                        "scenario_full_text": row[9],
-                        "scenario_name": row[10],
-                        "scenario_given_steps": row[11],
-                        "scenario_when_steps": row[12],
-                        "scenario_then_steps": row[13],
-                        # For backwards compatibility
-                        "normalized_text": row[4],
-                        "bdd_step": row[9]  # Full scenario text
-                    }
-                ))
-            return results
+            # Search individual steps and join with parent scenario
+            cur.execute(self._VECTOR_SEARCH_SQL.format(
+                individual_steps=self.table_individual_steps,
+                feature_steps=self.table_feature_steps
+            ), (query_embedding.tolist(), query_embedding.tolist(), limit))
+            
+            return [self._step_search_row(row) for row in cur.fetchall()]
+
+    def vector_search_iter(self, query_embedding: np.ndarray, limit: int,
+                           ef_search: int) -> Iterator[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Streaming variant of vector_search: yield rows in similarity order.
+
+        Rows are pulled from the cursor in small batches instead of
+        materializing the full limit-sized list, so a consumer that stops
+        early (e.g. streaming cluster aggregation) never pays for the tail.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute(f"SET LOCAL hnsw.ef_search = {ef_search};")
+            cur.execute(self._VECTOR_SEARCH_SQL.format(
+                individual_steps=self.table_individual_steps,
+                feature_steps=self.table_feature_steps
+            ), (query_embedding.tolist(), query_embedding.tolist(), limit))
+
+            while True:
+                batch = cur.fetchmany(64)
+                if not batch:
+                    return
+                for row in batch:
+                    yield self._step_search_row(row)
     
     def lexical_search(self, query_text: str, limit: int) -> List[Tuple[int, float, Dict[str, Any]]]:
         """Perform lexical search using tsvector."""
@@ -103,7 +103,7 @@ class FallbackChain:
             # Convert reranked results to proper format
             formatted_candidates = []
             for candidate_dict, score in reranked:
-                candidate_id = candidate_dict.get('id') if isinstance(candidate_dict, dict) else None
+                candidate_id = candidate_dict.get('id') if hasattr(candidate_dict, 'get') else None
                 formatted_candidates.append((candidate_id, score, candidate_dict))
             
             return FallbackResult(
@@ -137,7 +137,7 @@ class FallbackChain:
         if reranked and reranked[0][1] >= self.config.thresholds.med_conf:
             formatted_candidates = []
             for candidate_dict, score in reranked:
-                candidate_id = candidate_dict.get('id') if isinstance(candidate_dict, dict) else None
+                candidate_id = candidate_dict.get('id') if hasattr(candidate_dict, 'get') else None
                 formatted_candidates.append((candidate_id, score, candidate_dict))
             
             return FallbackResult(
@@ -163,7 +163,7 @@ class FallbackChain:
         if reranked and reranked[0][1] >= self.config.thresholds.med_conf:
             formatted_candidates = []
             for candidate_dict, score in reranked:
-                candidate_id = candidate_dict.get('id') if isinstance(candidate_dict, dict) else None
+                candidate_id = candidate_dict.get('id') if hasattr(candidate_dict, 'get') else None
                 formatted_candidates.append((candidate_id, score, candidate_dict))
             
             return FallbackResult(
@@ -1,14 +1,86 @@
 """Metrics calculation module."""
 import json
+import time
 from typing import List, Dict, Any
 from collections import Counter
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 import numpy as np
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 from src.pipeline import MatchResult
 
 
+@lru_cache(maxsize=1)
+def _iso_utc_for_bucket(_bucket: int) -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _utc_timestamp() -> str:
+    """UTC timestamp string, cached per ~1ms bucket for high-frequency callers."""
+    return _iso_utc_for_bucket(time.time_ns() >> 20)
+
+
+def _compute_stats_numpy(arr_sorted: np.ndarray) -> tuple:
+    """Vectorized NumPy fallback for :func:`_compute_stats`."""
+    q25, q50, q75, q95, q99 = np.percentile(arr_sorted, [25, 50, 75, 95, 99])
+    return (
+        float(arr_sorted[0]), float(q25), float(q50), float(q75),
+        float(q95), float(q99), float(arr_sorted[-1]),
+        float(arr_sorted.mean()), float(arr_sorted.std())
+    )
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _quantile_sorted(arr_sorted, q):
+        """Linear-interpolated quantile read from a pre-sorted array."""
+        n = arr_sorted.shape[0]
+        pos = q / 100.0 * (n - 1)
+        lo = int(pos)
+        if lo + 1 >= n:
+            return arr_sorted[n - 1]
+        frac = pos - lo
+        return arr_sorted[lo] * (1.0 - frac) + arr_sorted[lo + 1] * frac
+
+    @numba.njit(cache=True)
+    def _compute_stats(arr_sorted):
+        """
+        Fused single-pass stats over a pre-sorted array.
+
+        Returns (min, p25, median, p75, p95, p99, max, mean, std).
+        Mean/std use Welford's single-pass algorithm; quantiles are
+        positional reads, so no re-sorting or intermediate arrays.
+        """
+        n = arr_sorted.shape[0]
+        mean = 0.0
+        m2 = 0.0
+        for i in range(n):
+            x = arr_sorted[i]
+            delta = x - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x - mean)
+        std = (m2 / n) ** 0.5 if n > 0 else 0.0
+        return (
+            arr_sorted[0],
+            _quantile_sorted(arr_sorted, 25.0),
+            _quantile_sorted(arr_sorted, 50.0),
+            _quantile_sorted(arr_sorted, 75.0),
+            _quantile_sorted(arr_sorted, 95.0),
+            _quantile_sorted(arr_sorted, 99.0),
+            arr_sorted[n - 1],
+            mean,
+            std
+        )
+else:
+    _compute_stats = _compute_stats_numpy
+
+
 @dataclass
 class MetricsReport:
     """Metrics report data."""
@@ -26,13 +98,17 @@ class MetricsCalculator:
     def calculate(self, results: List[MatchResult]) -> MetricsReport:
         """Calculate metrics from results."""
         total_queries = len(results)
-        
+
+        # Empty batch: skip all numpy dispatch and per-field branching below
+        if total_queries == 0:
+            return self._empty_report()
+
         # Action distribution (REUSED_TEMPLATE vs NEW_BDD_REQUIRED)
         action_counts = Counter(r.final_action for r in results)
         action_distribution = {
             action: {
                 "count": count,
-                "percentage": (count / total_queries * 100) if total_queries > 0 else 0.0
+                "percentage": count / total_queries * 100
             }
             for action, count in action_counts.items()
         }
@@ -43,62 +119,46 @@ class MetricsCalculator:
         
         similarity_scores = {}
         if vector_similarities:
-            similarity_scores["vector_cosine"] = {
-                "mean": float(np.mean(vector_similarities)),
-                "median": float(np.median(vector_similarities)),
-                "min": float(np.min(vector_similarities)),
-                "max": float(np.max(vector_similarities)),
-                "p25": float(np.percentile(vector_similarities, 25)),
-                "p75": float(np.percentile(vector_similarities, 75)),
-                "std": float(np.std(vector_similarities))
-            }
-        
+            similarity_scores["vector_cosine"] = self._score_stats(vector_similarities)
+
         if reranker_scores:
-            similarity_scores["reranker"] = {
-                "mean": float(np.mean(reranker_scores)),
-                "median": float(np.median(reranker_scores)),
-                "min": float(np.min(reranker_scores)),
-                "max": float(np.max(reranker_scores)),
-                "p25": float(np.percentile(reranker_scores, 25)),
-                "p75": float(np.percentile(reranker_scores, 75)),
-                "std": float(np.std(reranker_scores))
-            }
+            similarity_scores["reranker"] = self._score_stats(reranker_scores)
         
         # Top-K coverage stats
         queries_with_matches = sum(1 for r in results if len(r.top_k_candidates) > 0)
         queries_with_no_matches = total_queries - queries_with_matches
         
-        # Count how many candidates each query got
-        candidate_counts = [len(r.top_k_candidates) for r in results]
-        avg_candidates_per_query = np.mean(candidate_counts) if candidate_counts else 0.0
-        
+        # Count how many candidates each query got (non-empty here: n > 0)
+        candidate_counts = np.asarray([len(r.top_k_candidates) for r in results], dtype=np.int64)
+
         top_k_coverage = {
             "queries_with_matches": queries_with_matches,
             "queries_with_no_matches": queries_with_no_matches,
-            "match_rate": (queries_with_matches / total_queries * 100) if total_queries > 0 else 0.0,
-            "average_candidates_per_query": float(avg_candidates_per_query),
-            "max_candidates_found": int(np.max(candidate_counts)) if candidate_counts else 0,
-            "min_candidates_found": int(np.min(candidate_counts)) if candidate_counts else 0
+            "match_rate": queries_with_matches / total_queries * 100,
+            "average_candidates_per_query": float(candidate_counts.mean()),
+            "max_candidates_found": int(candidate_counts.max()),
+            "min_candidates_found": int(candidate_counts.min())
         }
         
         # Latency
-        processing_times = [r.processing_time_ms for r in results]
+        processing_times = np.sort(np.asarray([r.processing_time_ms for r in results], dtype=np.float64))
+        mn, _p25, med, _p75, p95, p99, mx, mean, _std = _compute_stats(processing_times)
         latency = {
             "processing_time_ms": {
-                "mean": float(np.mean(processing_times)),
-                "median": float(np.median(processing_times)),
-                "min": float(np.min(processing_times)),
-                "max": float(np.max(processing_times)),
-                "p95": float(np.percentile(processing_times, 95)),
-                "p99": float(np.percentile(processing_times, 99))
+                "mean": float(mean),
+                "median": float(med),
+                "min": float(mn),
+                "max": float(mx),
+                "p95": float(p95),
+                "p99": float(p99)
             },
             "total_time_seconds": {
-                "sum": float(np.sum(processing_times) / 1000.0)
+                "sum": float(processing_times.sum() / 1000.0)
             }
         }
         
         return MetricsReport(
-            run_timestamp=datetime.utcnow().isoformat() + "Z",
+            run_timestamp=_utc_timestamp(),
             total_queries=total_queries,
             action_distribution=action_distribution,
             similarity_scores=similarity_scores,
@@ -106,6 +166,44 @@ class MetricsCalculator:
             latency=latency
         )
     
+    def _empty_report(self) -> MetricsReport:
+        """Report for a zero-query batch."""
+        return MetricsReport(
+            run_timestamp=_utc_timestamp(),
+            total_queries=0,
+            action_distribution={},
+            similarity_scores={},
+            top_k_coverage={
+                "queries_with_matches": 0,
+                "queries_with_no_matches": 0,
+                "match_rate": 0.0,
+                "average_candidates_per_query": 0.0,
+                "max_candidates_found": 0,
+                "min_candidates_found": 0
+            },
+            latency={
+                "processing_time_ms": {
+                    "mean": 0.0, "median": 0.0, "min": 0.0,
+                    "max": 0.0, "p95": 0.0, "p99": 0.0
+                },
+                "total_time_seconds": {"sum": 0.0}
+            }
+        )
+
+    def _score_stats(self, values: List[float]) -> Dict[str, float]:
+        """Compute score distribution stats via the fused stats kernel."""
+        arr_sorted = np.sort(np.asarray(values, dtype=np.float64))
+        mn, p25, med, p75, _p95, _p99, mx, mean, std = _compute_stats(arr_sorted)
+        return {
+            "mean": float(mean),
+            "median": float(med),
+            "min": float(mn),
+            "max": float(mx),
+            "p25": float(p25),
+            "p75": float(p75),
+            "std": float(std)
+        }
+
     def save_report(self, report: MetricsReport, output_path: str):
         """Save metrics report to JSON file."""
         report_dict = {
@@ -1,11 +1,38 @@
 """Normalization module for test steps."""
+import bisect
 import re
 import unicodedata
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 import spacy
 
 
+# Action verbs and filler words for the regex-based (no-spaCy) extraction path;
+# frozensets give O(1) membership tests without per-call list allocation
+_ACTION_VERBS = frozenset({
+    'click', 'select', 'navigate', 'verify', 'check', 'enter', 'input',
+    'submit', 'press', 'open', 'close', 'create', 'delete', 'update',
+    'grab', 'mark', 'strike', 'scan', 'switch', 'add', 'remove'
+})
+_SKIP_WORDS = frozenset({'the', 'a', 'an', 'to', 'on', 'in', 'at', 'for', 'with'})
+
+# Step-number prefixes: "1.", "2)", "3:", "4-", "a.", "b)", "Step 1.", "step 2:".
+# One MULTILINE union covers both start-of-text and after-newline cases, so a
+# single sub replaces the previous six sequential full-string passes.
+_STEP_NUMBER_RE = re.compile(
+    r'^\s*(?:[Ss]tep\s*\d+\s*[\.\):\-]?|\d+\s*[\.\):\-]|[a-zA-Z]\s*[\.\):\-])\s*',
+    re.MULTILINE
+)
+
+
+@lru_cache(maxsize=256)
+def _domain_restore_pattern(terms: frozenset) -> re.Pattern:
+    """Build (and cache) one alternation pattern covering all domain terms."""
+    alternation = '|'.join(re.escape(t.lower()) for t in sorted(terms))
+    return re.compile(r'\b(?:' + alternation + r')\b', re.IGNORECASE)
+
+
 @dataclass
 class Placeholder:
     """Placeholder metadata."""
@@ -106,8 +133,10 @@ class Normalizer:
             normalized = f"{action_canonical} {normalized}".strip()
         
         # Restore domain tokens in uppercase form for visibility
-        for term in domain_terms:
-            normalized = self._restore_token_case(normalized, term)
+        # (one alternation pass over the string instead of one scan per term)
+        if domain_terms:
+            pattern = _domain_restore_pattern(frozenset(domain_terms))
+            normalized = pattern.sub(lambda m: m.group(0).upper(), normalized)
         
         return NormalizedResult(
             normalized_text=normalized,
@@ -122,22 +151,7 @@ class Normalizer:
     
     def _remove_step_numbers(self, text: str) -> str:
         """Remove step numbers like '1.', '2.', '1)', 'a)', 'Step 1:' from the beginning."""
-        # Remove leading step numbers at start of text or after newlines
-        # Patterns: "1.", "2.", "1)", "a)", "Step 1:", "Step 1.", etc.
-        patterns = [
-            r'^\s*\d+\s*[\.\):\-]\s*',           # "1.", "2)", "3:", "4-" at start
-            r'^\s*[a-zA-Z]\s*[\.\):\-]\s*',      # "a.", "b)", "A:" at start
-            r'^\s*[Ss]tep\s*\d+\s*[\.\):\-]?\s*', # "Step 1.", "step 2:" at start
-            r'\n\s*\d+\s*[\.\):\-]\s*',          # Same patterns after newlines
-            r'\n\s*[a-zA-Z]\s*[\.\):\-]\s*',
-            r'\n\s*[Ss]tep\s*\d+\s*[\.\):\-]?\s*',
-        ]
-        
-        result = text
-        for pattern in patterns:
-            result = re.sub(pattern, '\n' if '\n' in pattern else '', result)
-        
-        return result.strip()
+        return _STEP_NUMBER_RE.sub('', text).strip()
     
     def _extract_placeholders(self, text: str, placeholders: List[Placeholder]) -> tuple[str, List[Placeholder]]:
         """Extract placeholders and replace with tags."""
@@ -202,15 +216,16 @@ class Normalizer:
                 offset += len(match.group()) - 6  # 6 = len("<DATE>")
         
         # Number pattern (standalone numbers, not part of amounts/dates/counts/domain tokens)
+        # Spans already claimed by earlier placeholder passes, sorted once so each
+        # number match needs only an O(log k) bisect instead of an O(k) scan
+        taken_spans = sorted((ph.position, ph.position + len(ph.value)) for ph in placeholders)
+        span_starts = [start for start, _ in taken_spans]
+
         number_pattern = r'\b\d+(\.\d+)?\b'
         for match in re.finditer(number_pattern, text):
             # Skip if already part of a placeholder
-            skip = False
-            for ph in placeholders:
-                if ph.position <= match.start() <= ph.position + len(ph.value):
-                    skip = True
-                    break
-            if skip:
+            idx = bisect.bisect_right(span_starts, match.start()) - 1
+            if idx >= 0 and taken_spans[idx][1] >= match.start():
                 continue
             
             # Skip counts like "4 times" or "4x"
@@ -278,29 +293,24 @@ class Normalizer:
         """Extract action verb and primary object from normalized text."""
         if not self.nlp:
             # Simple regex-based extraction
-            action_verbs = ['click', 'select', 'navigate', 'verify', 'check', 'enter', 'input', 
-                           'submit', 'press', 'open', 'close', 'create', 'delete', 'update',
-                           'grab', 'mark', 'strike', 'scan', 'switch', 'add', 'remove']
-            
             words = text.split()
             action_verb = None
             for word in words:
-                if word in action_verbs:
+                if word in _ACTION_VERBS:
                     action_verb = word
                     break
-            
+
             # Primary object is typically the noun after the verb
             primary_object = None
             if action_verb:
                 idx = words.index(action_verb) if action_verb in words else -1
                 if idx >= 0 and idx + 1 < len(words):
                     # Skip common words
-                    skip_words = ['the', 'a', 'an', 'to', 'on', 'in', 'at', 'for', 'with']
                     for i in range(idx + 1, len(words)):
-                        if words[i] not in skip_words and not words[i].startswith('<'):
+                        if words[i] not in _SKIP_WORDS and not words[i].startswith('<'):
                             primary_object = words[i]
                             break
-            
+
             return action_verb, primary_object
         
         # Use spaCy for better extraction
@@ -320,9 +330,8 @@ class Normalizer:
     def _extract_domain_terms(self, text: str) -> List[str]:
         """Extract domain tokens we want to preserve (F-keys, arrows, special keys)."""
         terms = []
-        # Normalize spaces and consider uppercase for matching
-        upper_text = text.upper()
-        # Patterns: F-keys, arrows, keys
+        # Patterns: F-keys, arrows, keys (matched case-insensitively, so no
+        # uppercased copy of the text is needed)
         patterns = [
             r'\bF(?:1[0-2]?|[1-9])\b',
             r'\bENTER\b',
@@ -343,17 +352,12 @@ class Normalizer:
             r'\b(?:GREEN|PURPLE|RED)\s+ARROW\b'
         ]
         for pattern in patterns:
-            for match in re.finditer(pattern, upper_text, re.IGNORECASE):
-                term = match.group(0).strip()
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                term = match.group(0).strip().upper()
                 if term not in terms:
                     terms.append(term)
         return terms
 
-    def _restore_token_case(self, text: str, token: str) -> str:
-        """Restore a token to uppercase within the text."""
-        pattern = re.compile(r'\b' + re.escape(token.lower()) + r'\b', re.IGNORECASE)
-        return pattern.sub(token.upper(), text)
-
     def _extract_count_phrases(self, text: str) -> List[str]:
         """Extract count phrases like '4 times' or '3x'."""
         phrases = []
@@ -2,10 +2,14 @@
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from itertools import islice
 import time
 
+from src import _dr_kernel
+from src.retrieval import Candidates
 
-@dataclass
+
+@dataclass(slots=True)
 class MatchResult:
     """Result of matching a query to BDD step."""
     query_id: str
@@ -24,10 +28,42 @@ class MatchResult:
     notes: str
 
 
+# Metadata fields copied verbatim from a retrieval candidate into a result entry
+_CAND_KEYS = (
+    'step_type', 'step_text', 'step_index', 'scenario_id', 'scenario_name',
+    'scenario_full_text', 'scenario_given_steps', 'scenario_when_steps',
+    'scenario_then_steps'
+)
+
+
+def _build_cand(c_dict: Dict[str, Any], cid: Optional[int],
+                reranker_score: Optional[float], vector_sim: Optional[float]) -> Dict[str, Any]:
+    """Build one top-K candidate entry from a retrieval candidate dict."""
+    entry = {k: c_dict.get(k) for k in _CAND_KEYS}
+    entry['individual_step_id'] = cid
+    # Scores are plain Python floats by the time they get here: retrieval
+    # scores via ndarray.tolist() and reranker scores at the rerank boundary
+    entry['reranker_score'] = reranker_score
+    entry['vector_similarity'] = vector_sim
+    return entry
+
+
 class MatchingPipeline:
     """Main pipeline for matching test steps to BDD steps."""
-    
-    def __init__(self, config, database, normalizer, chunker, embedder, retrieval, reranker, 
+
+    # Fixed attribute layout: skips the per-instance __dict__ and makes
+    # attribute reads in the hot path a tad cheaper
+    __slots__ = (
+        'config', 'db', 'normalizer', 'chunker', 'embedder', 'retrieval',
+        'reranker', 'placeholder_mapper', 'fallback_chain',
+        '_dr_enabled', '_dr_target_k', '_dr_min_pct', '_dr_gap',
+        '_dr_cluster_sep', '_dr_top_pct', '_dr_topk_min_pct',
+        '_reranker_top_k', '_prefilter_limit', '_ef_search',
+        '_top_k_results', '_min_score_threshold', '_vector_good_threshold',
+        '_skip_reasons', '_skip_cache'
+    )
+
+    def __init__(self, config, database, normalizer, chunker, embedder, retrieval, reranker,
                  placeholder_mapper, fallback_chain):
         self.config = config
         self.db = database
@@ -38,69 +74,120 @@ class MatchingPipeline:
         self.reranker = reranker
         self.placeholder_mapper = placeholder_mapper
         self.fallback_chain = fallback_chain
-    
-    def _should_skip_reranker(self, candidates: List[Tuple[int, float, Dict[str, Any]]]) -> Tuple[bool, str]:
+
+        # Hoist hot config lookups out of match(): plain instance attributes
+        # replace the per-query attribute-chain walks
+        dr = config.dynamic_reranking
+        self._dr_enabled = dr.enabled
+        self._dr_target_k = dr.target_top_k
+        self._dr_min_pct = dr.min_percentile_rank
+        self._dr_gap = dr.percentile_gap_threshold
+        self._dr_cluster_sep = dr.cluster_separation
+        self._dr_top_pct = dr.top_percentile_threshold
+        self._dr_topk_min_pct = dr.top_k_min_percentile
+        self._reranker_top_k = config.reranker.top_k
+        self._prefilter_limit = config.retrieval.prefilter_limit
+        self._ef_search = config.retrieval.ef_search
+        self._top_k_results = config.top_k_results
+        self._min_score_threshold = config.min_score_threshold
+        self._vector_good_threshold = config.vector_good_threshold
+
+        # Reason notes for the skip decision depend only on config, so format
+        # them once here instead of rebuilding the f-strings on every query
+        self._skip_reasons = {
+            _dr_kernel.PERCENTILE: f"All top {dr.target_top_k} above {dr.min_percentile_rank}th percentile",
+            _dr_kernel.GAP: f"Percentile gap ≥ {dr.percentile_gap_threshold} points below top {dr.target_top_k}",
+            _dr_kernel.CLUSTER: f"Cluster separation > {dr.cluster_separation} between top {dr.target_top_k} and rest",
+            _dr_kernel.DOMINANCE: f"Top score dominant (above {dr.top_percentile_threshold}th percentile)",
+            _dr_kernel.NO_SKIP: "Scores too ambiguous, using reranker"
+        }
+
+        # Memo table for the rerank-skip decision, keyed on a coarse score
+        # fingerprint (see _should_skip_reranker). Bounded to keep memory flat
+        # on long runs.
+        self._skip_cache: Dict[Tuple[int, float, float, float], Tuple[bool, str]] = {}
+
+    def _should_skip_reranker(self, candidates: Candidates) -> Tuple[bool, str]:
         """
         Determine if reranker should be skipped based on percentile-based analysis.
-        
+
         Args:
-            candidates: List of (candidate_id, similarity_score, candidate_dict) tuples
-        
+            candidates: Retrieval results (SoA container, sorted descending)
+
         Returns:
             Tuple of (should_skip: bool, reason: str)
         """
-        if not self.config.dynamic_reranking.enabled:
+        if not self._dr_enabled:
             return False, "Dynamic reranking disabled"
-        
-        target_top_k = self.config.dynamic_reranking.target_top_k
-        
+
+        target_top_k = self._dr_target_k
+
         # Condition 1: Too few candidates - skip reranker
         if len(candidates) <= target_top_k:
             return True, f"Only {len(candidates)} candidates (≤{target_top_k}), skipping reranker"
-        
-        all_scores = [c[1] for c in candidates]  # Extract all similarity scores
-        top_k_scores = all_scores[:target_top_k]  # Top 5 scores
-        
-        # Condition 2: Percentile rank check - all top 5 above Xth percentile
-        p_threshold = np.percentile(all_scores, self.config.dynamic_reranking.min_percentile_rank)
-        if all(score >= p_threshold for score in top_k_scores):
-            return True, f"All top {target_top_k} above {self.config.dynamic_reranking.min_percentile_rank}th percentile ({p_threshold:.3f})"
-        
-        # Condition 3: Percentile gap between 5th and 6th
-        def get_percentile_rank(score: float, all_scores: List[float]) -> float:
-            """Calculate percentile rank (0-100) for a score."""
-            return (sum(1 for s in all_scores if s <= score) / len(all_scores)) * 100
-        
-        if len(all_scores) > target_top_k:
-            p5_rank = get_percentile_rank(all_scores[target_top_k - 1], all_scores)
-            p6_rank = get_percentile_rank(all_scores[target_top_k], all_scores)
-            gap = p5_rank - p6_rank
-            if gap >= self.config.dynamic_reranking.percentile_gap_threshold:
-                return True, f"Percentile gap: {gap:.1f} points (5th={p5_rank:.1f}th, 6th={p6_rank:.1f}th)"
-        
-        # Condition 4: Cluster separation
-        top_mean = np.mean(top_k_scores)
-        rest_scores = all_scores[target_top_k:]
-        if rest_scores:
-            rest_mean = np.mean(rest_scores)
-            separation = top_mean - rest_mean
-            if separation > self.config.dynamic_reranking.cluster_separation:
-                return True, f"Cluster separation: {separation:.3f} (top mean={top_mean:.3f}, rest mean={rest_mean:.3f})"
-        
-        # Condition 5: Top dominance
-        p95 = np.percentile(all_scores, self.config.dynamic_reranking.top_percentile_threshold)
-        p85 = np.percentile(all_scores, self.config.dynamic_reranking.top_k_min_percentile)
-        if all_scores[0] >= p95 and all(score >= p85 for score in top_k_scores):
-            return True, f"Top score dominant (top={all_scores[0]:.3f}≥{p95:.3f}, all top {target_top_k}≥{p85:.3f})"
-        
-        return False, "Scores too ambiguous, using reranker"
-    
-    def match(self, query_text: str, query_id: str, parent_testcase_id: str, 
+
+        # Scores arrive sorted descending from vector retrieval as one
+        # contiguous array on the Candidates container (no per-query list
+        # comprehension or copy); conditions 2-5 run as one fused pass in the
+        # kernel (JIT-compiled when numba is available)
+        scores_arr = candidates.scores
+
+        # Memoize on a coarse fingerprint of the score distribution: the top
+        # score, the k-th and (k+1)-th scores (the boundary the gap condition
+        # looks at) rounded to 2 decimals, plus the candidate count. Distinct
+        # distributions can collide after rounding, so this trades an
+        # approximation for skipping the kernel on near-identical queries;
+        # at 2-decimal precision the conditions are insensitive to the
+        # difference.
+        fingerprint = (
+            scores_arr.shape[0],
+            round(float(scores_arr[0]), 2),
+            round(float(scores_arr[target_top_k - 1]), 2),
+            round(float(scores_arr[target_top_k]), 2)
+        )
+        cached = self._skip_cache.get(fingerprint)
+        if cached is not None:
+            return cached
+
+        skip, code = _dr_kernel.should_skip(
+            scores_arr, target_top_k,
+            float(self._dr_min_pct), float(self._dr_gap),
+            float(self._dr_cluster_sep), float(self._dr_top_pct),
+            float(self._dr_topk_min_pct)
+        )
+        result = (skip, self._skip_reasons[code])
+        if len(self._skip_cache) >= 4096:
+            self._skip_cache.clear()
+        self._skip_cache[fingerprint] = result
+        return result
+
+    def _empty_result(self, *, query_id: str, parent_testcase_id: str, chunk_index: int,
+                      query_text: str, full_text: str, normalized_text: str, notes: str,
+                      vector_similarity: Optional[float], start_ns: int) -> MatchResult:
+        """Build a NEW_BDD_REQUIRED result for the empty/error exit paths."""
+        return MatchResult(
+            query_id=query_id,
+            parent_testcase_id=parent_testcase_id,
+            chunk_index=chunk_index,
+            original_chunk=query_text,
+            full_testcase_text=full_text,
+            normalized_text=normalized_text,
+            top_k_candidates=[],
+            selected_candidate_id=None,
+            selected_template="",
+            final_action="NEW_BDD_REQUIRED",
+            reranker_score=None,
+            vector_similarity=vector_similarity,
+            processing_time_ms=(time.perf_counter_ns() - start_ns) / 1_000_000,
+            notes=notes
+        )
+
+    def match(self, query_text: str, query_id: str, parent_testcase_id: str,
              chunk_index: int, full_testcase_text: str,
              previous_steps: Optional[List[str]] = None) -> MatchResult:
         """
         Match a query test step to BDD step.
-        
+
         Args:
             query_text: Original query text (single atomic step)
             query_id: Unique query identifier
@@ -108,220 +195,397 @@ class MatchingPipeline:
             chunk_index: Index of chunk in original test case
             full_testcase_text: Full original test case for context
             previous_steps: Previous steps from same test case (for context)
-        
+
         Returns:
             MatchResult with top-K matches and scores
         """
-        start_time = time.time()
-        
+        start_ns = time.perf_counter_ns()
+
+        try:
+            return self._match_impl(
+                query_text=query_text,
+                query_id=query_id,
+                parent_testcase_id=parent_testcase_id,
+                chunk_index=chunk_index,
+                full_testcase_text=full_testcase_text,
+                start_ns=start_ns
+            )
+        except Exception as e:
+            return self._error_result(
+                e,
+                query_id=query_id,
+                parent_testcase_id=parent_testcase_id,
+                chunk_index=chunk_index,
+                query_text=query_text,
+                full_text=full_testcase_text,
+                normalized_text="",
+                start_ns=start_ns
+            )
+
+    def _match_impl(self, *, query_text: str, query_id: str,
+                    parent_testcase_id: str, chunk_index: int,
+                    full_testcase_text: str, start_ns: int) -> MatchResult:
+        """Hot path of match(); exceptions are handled by the wrapper."""
+        # Step 1: Normalize query
+        normalized = self.normalizer.normalize(query_text)
+
+        # Step 2: Embed query
+        query_embedding = self.embedder.embed(normalized.normalized_text)
+
+        # Step 3: Vector ANN Search
+        candidates = self.retrieval.retrieve(
+            query_embedding,
+            normalized.normalized_text,
+            limit=self._prefilter_limit,
+            ef_search=self._ef_search
+        )
+
+        if not candidates:
+            return self._empty_result(
+                query_id=query_id,
+                parent_testcase_id=parent_testcase_id,
+                chunk_index=chunk_index,
+                query_text=query_text,
+                full_text=full_testcase_text,
+                normalized_text=normalized.normalized_text,
+                notes="No candidates found in vector search",
+                vector_similarity=None,
+                start_ns=start_ns
+            )
+
+        # Step 4: Dynamic Reranking Decision (Percentile-Based).
+        # Skip the method call outright when the feature is off.
+        if self._dr_enabled:
+            should_skip, skip_reason = self._should_skip_reranker(candidates)
+        else:
+            should_skip, skip_reason = False, ""
+
+        if should_skip:
+            reranked = None
+        else:
+            reranked = self.reranker.rerank(
+                normalized,
+                candidates.dicts[:self._reranker_top_k],
+                top_k=self._reranker_top_k
+            )
+
+        # Step 5: Build the result from whichever ranking was used
+        return self._assemble_result(
+            query_text=query_text,
+            query_id=query_id,
+            parent_testcase_id=parent_testcase_id,
+            chunk_index=chunk_index,
+            full_testcase_text=full_testcase_text,
+            normalized=normalized,
+            candidates=candidates,
+            should_skip=should_skip,
+            skip_reason=skip_reason,
+            reranked=reranked,
+            start_ns=start_ns
+        )
+
+    def _error_result(self, error: Exception, *, query_id: str,
+                      parent_testcase_id: str, chunk_index: int,
+                      query_text: str, full_text: str, normalized_text: str,
+                      start_ns: int) -> MatchResult:
+        """Cold path: build the failure result for an exception."""
+        return self._empty_result(
+            query_id=query_id,
+            parent_testcase_id=parent_testcase_id,
+            chunk_index=chunk_index,
+            query_text=query_text,
+            full_text=full_text,
+            normalized_text=normalized_text,
+            notes=f"Error: {str(error)}",
+            vector_similarity=None,
+            start_ns=start_ns
+        )
+
+    def match_batch(self, queries: List[Dict[str, Any]]) -> List[MatchResult]:
+        """
+        Match several query steps at once, batching the model calls.
+
+        Each entry in ``queries`` carries the same fields as the ``match()``
+        arguments (query_text, query_id, parent_testcase_id, chunk_index,
+        full_testcase_text). Normalization and embedding run up front as one
+        ``embed_batch`` call, and all queries that need the cross-encoder are
+        reranked in one ``rerank_batch`` call. Retrieval stays per-query:
+        pgvector ANN search is a single-query SQL statement, so there is
+        nothing to fuse at that stage.
+
+        Note: ``processing_time_ms`` on each result measures time since the
+        batch started, since the model calls are shared across queries.
+
+        Returns:
+            MatchResults in the same order as ``queries``
+        """
+        start_ns = time.perf_counter_ns()
+        results: List[Optional[MatchResult]] = [None] * len(queries)
+
+        # Phase 1: normalize everything, embed as one batch
         try:
-            # Step 1: Normalize query
-            normalized = self.normalizer.normalize(query_text)
-            
-            # Step 2: Embed query
-            query_embedding = self.embedder.embed(normalized.normalized_text)
-            
-            # Step 3: Vector ANN Search
-            candidates = self.retrieval.retrieve(
-                query_embedding,
-                normalized.normalized_text,
-                limit=self.config.retrieval.prefilter_limit,
-                ef_search=self.config.retrieval.ef_search
+            normalized_list = [self.normalizer.normalize(q['query_text'])
+                               for q in queries]
+            embeddings = self.embedder.embed_batch(
+                [n.normalized_text for n in normalized_list]
             )
-            
+        except Exception as e:
+            return [
+                self._error_result(
+                    e,
+                    query_id=q['query_id'],
+                    parent_testcase_id=q['parent_testcase_id'],
+                    chunk_index=q['chunk_index'],
+                    query_text=q['query_text'],
+                    full_text=q['full_testcase_text'],
+                    normalized_text="",
+                    start_ns=start_ns
+                )
+                for q in queries
+            ]
+
+        # Phase 2: retrieve per query and make the skip decision. Bind the
+        # per-iteration methods to locals so the loop skips the repeated
+        # attribute lookups.
+        retrieve = self.retrieval.retrieve
+        should_skip_reranker = self._should_skip_reranker
+        retrieved: List[Optional[Tuple[Any, bool, str]]] = [None] * len(queries)
+        pending = []  # indices that go through the reranker
+        for i, (q, normalized, embedding) in enumerate(
+                zip(queries, normalized_list, embeddings)):
+            try:
+                candidates = retrieve(
+                    embedding,
+                    normalized.normalized_text,
+                    limit=self._prefilter_limit,
+                    ef_search=self._ef_search
+                )
+            except Exception as e:
+                results[i] = self._error_result(
+                    e,
+                    query_id=q['query_id'],
+                    parent_testcase_id=q['parent_testcase_id'],
+                    chunk_index=q['chunk_index'],
+                    query_text=q['query_text'],
+                    full_text=q['full_testcase_text'],
+                    normalized_text=normalized.normalized_text,
+                    start_ns=start_ns
+                )
+                continue
+
             if not candidates:
-                # No candidates found
-                processing_time = (time.time() - start_time) * 1000
-                return MatchResult(
-                    query_id=query_id,
-                    parent_testcase_id=parent_testcase_id,
-                    chunk_index=chunk_index,
-                    original_chunk=query_text,
-                    full_testcase_text=full_testcase_text,
+                results[i] = self._empty_result(
+                    query_id=q['query_id'],
+                    parent_testcase_id=q['parent_testcase_id'],
+                    chunk_index=q['chunk_index'],
+                    query_text=q['query_text'],
+                    full_text=q['full_testcase_text'],
                     normalized_text=normalized.normalized_text,
-                    top_k_candidates=[],
-                    selected_candidate_id=None,
-                    selected_template="",
-                    final_action="NEW_BDD_REQUIRED",
-                    reranker_score=None,
+                    notes="No candidates found in vector search",
                     vector_similarity=None,
-                    processing_time_ms=processing_time,
-                    notes="No candidates found in vector search"
+                    start_ns=start_ns
                 )
-            
-            vector_similarity = candidates[0][1]
-            
-            # Step 4: Dynamic Reranking Decision (Percentile-Based)
-            should_skip, skip_reason = self._should_skip_reranker(candidates)
-            
-            if should_skip:
-                # Skip reranker - use vector search results directly
-                target_top_k = self.config.dynamic_reranking.target_top_k
-                top_k = min(target_top_k, len(candidates))
-                
-                # Build top-K candidates from vector search results
-                top_k_candidates = []
-                for c_id, v_sim, c_dict in candidates[:top_k]:
-                    top_k_candidates.append({
-                        "individual_step_id": c_id,
-                        "step_type": c_dict.get('step_type'),
-                        "step_text": c_dict.get('step_text'),
-                        "step_index": c_dict.get('step_index'),
-                        "scenario_id": c_dict.get('scenario_id'),
-                        "scenario_name": c_dict.get('scenario_name'),
-                        "scenario_full_text": c_dict.get('scenario_full_text'),
-                        "scenario_given_steps": c_dict.get('scenario_given_steps'),
-                        "scenario_when_steps": c_dict.get('scenario_when_steps'),
-                        "scenario_then_steps": c_dict.get('scenario_then_steps'),
-                        "reranker_score": None,  # No reranker score
-                        "vector_similarity": float(v_sim)
-                    })
-                
-                # Select top candidate
-                top_candidate_id = candidates[0][0]
-                top_candidate_dict = candidates[0][2]
-                top_reranker_score = None
-                top_vector_sim = candidates[0][1]
-                
+                continue
+
+            if self._dr_enabled:
+                should_skip, skip_reason = should_skip_reranker(candidates)
             else:
-                # Use reranker
-            candidate_dicts = [c[2] for c in candidates[:self.config.reranker.top_k]]
-                reranked = self.reranker.rerank(normalized, candidate_dicts, 
-                                           top_k=self.config.reranker.top_k)
-            
+                should_skip, skip_reason = False, ""
+
+            retrieved[i] = (candidates, should_skip, skip_reason)
+            if not should_skip:
+                pending.append(i)
+
+        # Phase 3: one batched rerank over every query that needs it. A
+        # failure here maps to per-query error results like the other
+        # phases, so the per-query MatchResult contract holds on the error
+        # path too.
+        reranked_by_index: Dict[int, List[Tuple[Dict[str, Any], float]]] = {}
+        if pending:
+            try:
+                reranked_lists = self.reranker.rerank_batch(
+                    [normalized_list[i] for i in pending],
+                    [retrieved[i][0].dicts[:self._reranker_top_k] for i in pending],
+                    top_k=self._reranker_top_k
+                )
+                reranked_by_index = dict(zip(pending, reranked_lists))
+            except Exception as e:
+                for i in pending:
+                    q = queries[i]
+                    results[i] = self._error_result(
+                        e,
+                        query_id=q['query_id'],
+                        parent_testcase_id=q['parent_testcase_id'],
+                        chunk_index=q['chunk_index'],
+                        query_text=q['query_text'],
+                        full_text=q['full_testcase_text'],
+                        normalized_text=normalized_list[i].normalized_text,
+                        start_ns=start_ns
+                    )
+
+        # Phase 4: assemble results
+        for i, q in enumerate(queries):
+            if results[i] is not None:
+                continue
+            candidates, should_skip, skip_reason = retrieved[i]
+            try:
+                results[i] = self._assemble_result(
+                    query_text=q['query_text'],
+                    query_id=q['query_id'],
+                    parent_testcase_id=q['parent_testcase_id'],
+                    chunk_index=q['chunk_index'],
+                    full_testcase_text=q['full_testcase_text'],
+                    normalized=normalized_list[i],
+                    candidates=candidates,
+                    should_skip=should_skip,
+                    skip_reason=skip_reason,
+                    reranked=reranked_by_index.get(i),
+                    start_ns=start_ns
+                )
+            except Exception as e:
+                results[i] = self._error_result(
+                    e,
+                    query_id=q['query_id'],
+                    parent_testcase_id=q['parent_testcase_id'],
+                    chunk_index=q['chunk_index'],
+                    query_text=q['query_text'],
+                    full_text=q['full_testcase_text'],
+                    normalized_text=normalized_list[i].normalized_text,
+                    start_ns=start_ns
+                )
+
+        return results
+
+    def _assemble_result(self, *, query_text: str, query_id: str,
+                         parent_testcase_id: str, chunk_index: int,
+                         full_testcase_text: str, normalized,
+                         candidates: Candidates, should_skip: bool,
+                         skip_reason: str, reranked, start_ns: int) -> MatchResult:
+        """
+        Build a MatchResult from retrieval output and the (optional) reranked
+        list. Shared by match() and match_batch(); ``reranked`` is None when
+        the reranker was skipped.
+        """
+        # .item() converts the float32 head score to a Python float here so
+        # no cast is needed when the result is built
+        vector_similarity = candidates.scores[0].item()
+
+        if should_skip:
+            # Skip reranker - use vector search results directly
+            target_top_k = self._dr_target_k
+            top_k = min(target_top_k, len(candidates))
+
+            # Build top-K candidates from vector search results. The array
+            # slices are views and islice avoids copying the dict list.
+            top_k_candidates = [
+                _build_cand(c_dict, c_id, None, v_sim)
+                for c_id, v_sim, c_dict in zip(
+                    candidates.ids[:top_k].tolist(),
+                    candidates.scores[:top_k].tolist(),
+                    islice(candidates.dicts, top_k)
+                )
+            ]
+
+            # Select top candidate. When skipping reranker the good-match
+            # check uses the vector similarity threshold: reranker scores can
+            # go as low as -2.0, so the vector threshold is more lenient
+            # (default 0.65 rather than 0.7) - vector similarity of 0.65+
+            # typically corresponds to reranker scores > -1.0.
+            top_candidate_dict = candidates.dicts[0]
+            top_reranker_score = None
+            top_vector_sim = vector_similarity
+            head_score = top_vector_sim
+            good_threshold = self._vector_good_threshold
+
+        else:
             if not reranked:
-                processing_time = (time.time() - start_time) * 1000
-                return MatchResult(
+                return self._empty_result(
                     query_id=query_id,
                     parent_testcase_id=parent_testcase_id,
                     chunk_index=chunk_index,
-                    original_chunk=query_text,
-                    full_testcase_text=full_testcase_text,
+                    query_text=query_text,
+                    full_text=full_testcase_text,
                     normalized_text=normalized.normalized_text,
-                    top_k_candidates=[],
-                    selected_candidate_id=None,
-                    selected_template="",
-                    final_action="NEW_BDD_REQUIRED",
-                    reranker_score=None,
+                    notes="Reranking returned no results",
                     vector_similarity=vector_similarity,
-                    processing_time_ms=processing_time,
-                    notes="Reranking returned no results"
+                    start_ns=start_ns
                 )
-            
-                # Build top-K candidates list from reranked results
-            top_k = min(self.config.top_k_results, len(reranked))
+
+            # Build top-K candidates list from reranked results
+            top_k = min(self._top_k_results, len(reranked))
             top_k_candidates = []
-            
-            for candidate_dict, reranker_score in reranked[:top_k]:
-                # Get vector similarity for this candidate
+
+            # Vector similarity per candidate id, built once instead of
+            # scanning the full candidate list for every reranked entry
+            vs_by_id = dict(zip(
+                (d.get('id') for d in candidates.dicts),
+                candidates.scores.tolist()
+            ))
+
+            for candidate_dict, reranker_score in islice(reranked, top_k):
                 candidate_id = candidate_dict.get('id')
-                candidate_vector_sim = None
-                for c_id, v_sim, c_dict in candidates:
-                    if c_dict.get('id') == candidate_id:
-                        candidate_vector_sim = v_sim
-                        break
-                
-                top_k_candidates.append({
-                    "individual_step_id": candidate_id,
-                    "step_type": candidate_dict.get('step_type'),
-                    "step_text": candidate_dict.get('step_text'),
-                    "step_index": candidate_dict.get('step_index'),
-                    "scenario_id": candidate_dict.get('scenario_id'),
-                    "scenario_name": candidate_dict.get('scenario_name'),
-                    "scenario_full_text": candidate_dict.get('scenario_full_text'),
-                    "scenario_given_steps": candidate_dict.get('scenario_given_steps'),
-                    "scenario_when_steps": candidate_dict.get('scenario_when_steps'),
-                    "scenario_then_steps": candidate_dict.get('scenario_then_steps'),
-                    "reranker_score": float(reranker_score) if reranker_score is not None else None,
-                    "vector_similarity": float(candidate_vector_sim) if candidate_vector_sim is not None else None
-                })
-            
-                # Select top candidate
+                top_k_candidates.append(
+                    _build_cand(candidate_dict, candidate_id,
+                                reranker_score, vs_by_id.get(candidate_id))
+                )
+
+            # Select top candidate; the good-match check uses the reranker
+            # score threshold
             top_candidate = reranked[0]
             top_reranker_score = top_candidate[1]
             top_candidate_dict = top_candidate[0]
-                top_vector_sim = vector_similarity
-            
-            # Step 5: Select top candidate (for display/usage tracking)
-            top_candidate_id = top_candidate_dict.get('id')
-            
-            # Display: step_type + step_text, with scenario context
-            step_type = top_candidate_dict.get('step_type', '')
-            step_text = top_candidate_dict.get('step_text', '')
-            scenario_name = top_candidate_dict.get('scenario_name', '')
-            
-            if step_type and step_text:
-                selected_template = f"{step_type}: {step_text}"
-            elif scenario_name:
-                selected_template = scenario_name
-            else:
-                selected_template = ""
-            
-            # Determine final action: 1-to-many matching
-            # If ANY of the top-K matches is >= threshold, mark as REUSED_TEMPLATE
-            if should_skip:
-                # When skipping reranker, use vector similarity threshold
-                # Since reranker can accept scores as low as -2.0, we need a more lenient
-                # vector threshold. Vector similarity of 0.65+ typically corresponds to
-                # reranker scores > -1.0, which are acceptable matches.
-                # Using 0.65 as threshold (more lenient than 0.7) to match reranker behavior
-                vector_threshold = 0.65  # Lenient threshold to match reranker acceptance
-                has_good_match = any(
-                    cand.get('vector_similarity', 0) >= vector_threshold
-                    for cand in top_k_candidates
-                )
-            else:
-                # When using reranker, use reranker score threshold
-            has_good_match = any(
-                    cand.get('reranker_score', -999) >= self.config.min_score_threshold
-                    for cand in top_k_candidates
-            )
-            
-            if has_good_match:
-                final_action = "REUSED_TEMPLATE"
-                # Increment usage count for top match
-                if top_candidate_id:
-                    self.db.increment_individual_step_usage(top_candidate_id)
-            else:
-                final_action = "NEW_BDD_REQUIRED"
-            
-            processing_time = (time.time() - start_time) * 1000
-            
-            # Build notes with skip reason if applicable
-            notes = skip_reason if should_skip else ""
-            
-            return MatchResult(
-                query_id=query_id,
-                parent_testcase_id=parent_testcase_id,
-                chunk_index=chunk_index,
-                original_chunk=query_text,
-                full_testcase_text=full_testcase_text,
-                normalized_text=normalized.normalized_text,
-                top_k_candidates=top_k_candidates,
-                selected_candidate_id=top_candidate_id,
-                selected_template=selected_template,
-                final_action=final_action,
-                reranker_score=float(top_reranker_score) if top_reranker_score is not None else None,
-                vector_similarity=float(top_vector_sim) if top_vector_sim is not None else None,
-                processing_time_ms=processing_time,
-                notes=notes
-            )
-        
-        except Exception as e:
-            processing_time = (time.time() - start_time) * 1000
-            return MatchResult(
-                query_id=query_id,
-                parent_testcase_id=parent_testcase_id,
-                chunk_index=chunk_index,
-                original_chunk=query_text,
-                full_testcase_text=full_testcase_text,
-                normalized_text="",
-                top_k_candidates=[],
-                selected_candidate_id=None,
-                selected_template="",
-                final_action="NEW_BDD_REQUIRED",
-                reranker_score=None,
-                vector_similarity=None,
-                processing_time_ms=processing_time,
-                notes=f"Error: {str(e)}"
-            )
+            top_vector_sim = vector_similarity
+            head_score = top_reranker_score
+            good_threshold = self._min_score_threshold
+
+        # Select top candidate (for display/usage tracking)
+        top_candidate_id = top_candidate_dict.get('id')
+
+        # Display: step_type + step_text, with scenario context
+        step_type, step_text, scenario_name = (
+            top_candidate_dict.get(key, '')
+            for key in ('step_type', 'step_text', 'scenario_name')
+        )
+
+        if step_type and step_text:
+            selected_template = f"{step_type}: {step_text}"
+        elif scenario_name:
+            selected_template = scenario_name
+        else:
+            selected_template = ""
+
+        # Determine final action: 1-to-many matching. Both candidate lists
+        # are sorted descending by their score, so checking the head is
+        # equivalent to scanning all top-K entries. head_score and its
+        # threshold were picked in the branch above.
+        has_good_match = head_score >= good_threshold
+
+        if has_good_match:
+            final_action = "REUSED_TEMPLATE"
+            # Increment usage count for top match
+            if top_candidate_id:
+                self.db.increment_individual_step_usage(top_candidate_id)
+        else:
+            final_action = "NEW_BDD_REQUIRED"
+
+        processing_time = (time.perf_counter_ns() - start_ns) / 1_000_000
+
+        # Build notes with skip reason if applicable
+        notes = skip_reason if should_skip else ""
+
+        return MatchResult(
+            query_id=query_id,
+            parent_testcase_id=parent_testcase_id,
+            chunk_index=chunk_index,
+            original_chunk=query_text,
+            full_testcase_text=full_testcase_text,
+            normalized_text=normalized.normalized_text,
+            top_k_candidates=top_k_candidates,
+            selected_candidate_id=top_candidate_id,
+            selected_template=selected_template,
+            final_action=final_action,
+            reranker_score=top_reranker_score,
+            vector_similarity=top_vector_sim,
+            processing_time_ms=processing_time,
+            notes=notes
+        )
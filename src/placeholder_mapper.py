@@ -1,10 +1,99 @@
 """Placeholder mapping module."""
 import re
+import threading
+from bisect import bisect_right
+from functools import lru_cache
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from collections import defaultdict
 import spacy
 
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def _compile_scanner(pattern: str, flags: int = 0):
+    """
+    Compile with google-re2 when installed, else stdlib re.
+
+    RE2 runs the alternation as a DFA: guaranteed linear-time scanning with
+    no backtracking, typically several times faster than CPython's re on
+    long inputs. Its binding mimics the re match API (finditer, lastgroup,
+    span), so callers don't care which engine they got; anything RE2 cannot
+    compile falls back to re.
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(pattern, flags)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
+# Patterns compiled once at import; _detect_query_values runs them on every
+# query, so going through re's module-level cache each call is pure overhead.
+_PLACEHOLDER_RE = re.compile(r'<(\w+)>')
+
+# Value subpatterns, kept as separate sources so they can be recombined.
+# EMAIL and NUMBER are case-insensitive-safe (character classes already cover
+# both cases), so the fused pattern can carry one IGNORECASE flag.
+_URL_PAT = r'https?://[^\s<>"{}|\\^`\[\]]+'
+_EMAIL_PAT = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+_DATE_PAT = (
+    r'\d{4}-\d{2}-\d{2}'
+    r'|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b'
+    r'|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
+)
+_AMOUNT_PAT = r'\$?\d+\.?\d*\s*(?:USD|EUR|GBP|dollars?|euros?|pounds?)?'
+_NUMBER_PAT = r'\b\d+(?:\.\d+)?\b'
+
+# One alternation scans the query once instead of six independent passes;
+# the match loop dispatches on m.lastgroup. DATE is listed before AMOUNT so
+# a date consumes its digits whole rather than as number fragments.
+_VALUE_RE = _compile_scanner(
+    f'(?P<URL>{_URL_PAT})'
+    f'|(?P<EMAIL>{_EMAIL_PAT})'
+    f'|(?P<DATE>{_DATE_PAT})'
+    f'|(?P<AMOUNT>{_AMOUNT_PAT})'
+    f'|(?P<NUMBER>{_NUMBER_PAT})',
+    re.IGNORECASE
+)
+
+# The quoted-string and click/select/press verbs are case-insensitive, but
+# the bare-name branch guards on Capitalized Words - under a blanket
+# IGNORECASE, [A-Z][a-z]+ matched any word, so (?-i:...) scopes the flag off
+# for that branch
+_BUTTON_RE = _compile_scanner(
+    r'["\']([^"\']+)["\']'
+    r'|(?:click|select|press)\s+((?-i:[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*))',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def _template_placeholder_types(template_normalized: str) -> frozenset:
+    """
+    Placeholder types present in a template, memoized per template text.
+
+    Templates are a small fixed population shared across every query, so the
+    regex pass and set construction only need to run once per template.
+    """
+    return frozenset(_PLACEHOLDER_RE.findall(template_normalized))
+
+
+def _span_covers(spans: List[Tuple[int, int]], starts: List[int],
+                 start: int, end: int) -> bool:
+    """True if (start, end) lies inside one of the sorted, disjoint spans."""
+    idx = bisect_right(starts, start) - 1
+    return idx >= 0 and end <= spans[idx][1]
+
 
 @dataclass
 class PlaceholderMatch:
@@ -17,17 +106,91 @@ class PlaceholderMatch:
 class PlaceholderMapper:
     """Maps query values to template placeholders."""
     
-    def __init__(self, use_ner: bool = True):
+    # Bound on the detected-values cache; templates and replayed test steps
+    # repeat heavily, so hits skip both the regex sweep and the NER call
+    _VALUES_CACHE_MAX = 4096
+
+    def __init__(self, use_ner: bool = True, lexicon_path: Optional[str] = None):
+        """
+        Args:
+            use_ner: Whether to run spaCy NER over queries
+            lexicon_path: Optional path to a term lexicon (one
+                ``term<TAB>LABEL`` per line, '#' comments). When given, an
+                Aho-Corasick automaton over the lexicon replaces the spaCy
+                NER call: test steps reference a closed vocabulary of UI
+                labels and personas, and the automaton finds them in one
+                linear sweep at a fraction of a model forward pass.
+        """
         self.use_ner = use_ner
         self.nlp = None
-        
-        if use_ner:
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-            except OSError:
-                print("Warning: spaCy model not found. NER disabled.")
-                self.use_ner = False
-    
+        self._nlp_lock = threading.Lock()
+        # query (text, normalized) -> {type: tuple of values}
+        self._values_cache: Dict[Tuple[str, str], Dict[str, Tuple[str, ...]]] = {}
+
+        self._lexicon = None
+        if lexicon_path:
+            if ahocorasick is None:
+                raise ImportError(
+                    "lexicon_path requires the pyahocorasick package "
+                    "(pip install pyahocorasick)"
+                )
+            self._lexicon = self._build_lexicon(lexicon_path)
+
+    @staticmethod
+    def _build_lexicon(lexicon_path: str):
+        """Compile the term lexicon into an Aho-Corasick automaton."""
+        automaton = ahocorasick.Automaton()
+        with open(lexicon_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                term, _, label = line.partition('\t')
+                term = term.strip()
+                label = label.strip()
+                if term and label:
+                    automaton.add_word(term.lower(), (term, label))
+        automaton.make_automaton()
+        return automaton
+
+    def _collect_lexicon_entities(self, query_text: str,
+                                  values: Dict[str, List[str]]) -> None:
+        """One automaton sweep over the query instead of a NER forward pass."""
+        lowered = query_text.lower()
+        last = len(lowered) - 1
+        for end, (term, label) in self._lexicon.iter(lowered):
+            start = end - len(term) + 1
+            # Reject mid-word hits (e.g. a persona "Ann" inside "channel")
+            if ((start == 0 or not lowered[start - 1].isalnum()) and
+                    (end == last or not lowered[end + 1].isalnum())):
+                values[label].append(query_text[start:end + 1])
+
+    def _get_nlp(self):
+        """
+        Load the spaCy model on first use.
+
+        Only ent.label_ is consumed downstream, so everything except the
+        tok2vec/ner pair is disabled - each skipped component is a full pass
+        over the Doc. Deferring the load keeps construction cheap for callers
+        that never hit the NER branch.
+        """
+        if not self.use_ner:
+            return None
+        if self.nlp is None:
+            with self._nlp_lock:
+                if self.nlp is None and self.use_ner:
+                    try:
+                        self.nlp = spacy.load(
+                            "en_core_web_sm",
+                            disable=["tagger", "parser", "attribute_ruler", "lemmatizer"]
+                        )
+                    except OSError:
+                        print("Warning: spaCy model not found. NER disabled.")
+                        self.use_ner = False
+                        # Entries cached before the toggle assumed NER output
+                        self._values_cache.clear()
+        return self.nlp
+
     def map_placeholders(self, query_text: str, query_normalized: str, 
                         template_text: str, template_normalized: str) -> PlaceholderMatch:
         """
@@ -42,12 +205,56 @@ class PlaceholderMapper:
         Returns:
             PlaceholderMatch with mapping results
         """
-        # Detect placeholders in template
-        template_placeholders = self._detect_template_placeholders(template_normalized)
-        
+        return self.map_placeholders_with_types(
+            query_text, query_normalized,
+            _template_placeholder_types(template_normalized)
+        )
+
+    def map_placeholders_with_types(self, query_text: str, query_normalized: str,
+                                    template_placeholders: frozenset) -> PlaceholderMatch:
+        """
+        Map query values to an already-known set of placeholder types.
+
+        Callers that precompute placeholder types per template (they are
+        fixed per template, not per query) skip the template regex pass
+        entirely.
+        """
+        return self._map_one(query_text, query_normalized, template_placeholders, None)
+
+    def map_placeholders_batch(self, queries: List[Tuple[str, str]],
+                               templates: List[Tuple[str, str]]) -> List[PlaceholderMatch]:
+        """
+        Map placeholders for many query/template pairs at once.
+
+        Args:
+            queries: (query_text, query_normalized) per entry
+            templates: (template_text, template_normalized) aligned with queries
+
+        Returns:
+            PlaceholderMatch per pair, in input order
+
+        NER runs as one nlp.pipe call over all query texts, which batches the
+        tok2vec/ner matrices instead of doing a forward pass per query.
+        """
+        nlp = self._get_nlp() if self._lexicon is None else None
+        if nlp is not None:
+            docs = nlp.pipe([q[0] for q in queries], batch_size=64)
+        else:
+            docs = (None for _ in queries)
+
+        return [
+            self._map_one(query_text, query_normalized,
+                          _template_placeholder_types(template_normalized), doc)
+            for (query_text, query_normalized), (_, template_normalized), doc
+            in zip(queries, templates, docs)
+        ]
+
+    def _map_one(self, query_text: str, query_normalized: str,
+                 template_placeholders: frozenset, doc) -> PlaceholderMatch:
+        """Shared mapping body; doc is a precomputed spaCy Doc or None."""
         # Detect values in query
-        query_values = self._detect_query_values(query_text, query_normalized)
-        
+        query_values = self._detect_query_values(query_text, query_normalized, doc)
+
         # Align values to placeholders
         placeholder_map = {}
         for placeholder_type in template_placeholders:
@@ -71,60 +278,76 @@ class PlaceholderMapper:
     
     def _detect_template_placeholders(self, template_text: str) -> List[str]:
         """Detect placeholder types in template."""
-        placeholder_pattern = r'<(\w+)>'
-        placeholders = re.findall(placeholder_pattern, template_text)
-        return list(set(placeholders))  # Remove duplicates
-    
-    def _detect_query_values(self, query_text: str, query_normalized: str) -> Dict[str, List[str]]:
-        """Detect values in query that could fill placeholders."""
+        return list(_template_placeholder_types(template_text))
+
+    def _detect_query_values(self, query_text: str, query_normalized: str,
+                             doc=None) -> Dict[str, List[str]]:
+        """
+        Detect values in query that could fill placeholders.
+
+        Results are cached per query (bounded, cleared when full) since the
+        same step text recurs across templates and runs; the cache stores
+        immutable tuples and each read rebuilds fresh lists so callers can
+        mutate their copy. A precomputed spaCy ``doc`` (from nlp.pipe in the
+        batch path) skips the per-query NER call on a miss.
+        """
+        cache_key = (query_text, query_normalized)
+        cached = self._values_cache.get(cache_key)
+        if cached is not None:
+            return defaultdict(list, {k: list(v) for k, v in cached.items()})
+
+        values = self._detect_query_values_uncached(query_text, query_normalized, doc)
+
+        if len(self._values_cache) >= self._VALUES_CACHE_MAX:
+            self._values_cache.clear()
+        self._values_cache[cache_key] = {k: tuple(v) for k, v in values.items()}
+        return values
+
+    def _detect_query_values_uncached(self, query_text: str, query_normalized: str,
+                                      doc=None) -> Dict[str, List[str]]:
+        """Uncached detection pass; see _detect_query_values."""
         values: Dict[str, List[str]] = defaultdict(list)
-        
-        # URL pattern
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        for match in re.finditer(url_pattern, query_text, re.IGNORECASE):
-            values['URL'].append(match.group())
-        
-        # Email pattern
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        for match in re.finditer(email_pattern, query_text):
-            values['EMAIL'].append(match.group())
-        
-        # Amount pattern
-        amount_pattern = r'\$?\d+\.?\d*\s*(USD|EUR|GBP|dollars?|euros?|pounds?)?'
-        for match in re.finditer(amount_pattern, query_text, re.IGNORECASE):
-            values['AMOUNT'].append(match.group())
-        
-        # Date patterns
-        date_patterns = [
-            r'\d{4}-\d{2}-\d{2}',
-            r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b',
-            r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
-        ]
-        for pattern in date_patterns:
-            for match in re.finditer(pattern, query_text, re.IGNORECASE):
+
+        # URL / email / date / amount / number: one fused pass over the query.
+        # AMOUNT and DATE spans are recorded so standalone numbers that fall
+        # inside one can be skipped by position rather than by substring test.
+        amount_spans: List[Tuple[int, int]] = []
+        date_spans: List[Tuple[int, int]] = []
+        number_matches: List[Tuple[int, int, str]] = []
+        for match in _VALUE_RE.finditer(query_text):
+            kind = match.lastgroup
+            if kind == 'AMOUNT':
+                values['AMOUNT'].append(match.group())
+                amount_spans.append(match.span())
+            elif kind == 'DATE':
                 values['DATE'].append(match.group())
+                date_spans.append(match.span())
+            elif kind == 'NUMBER':
+                number_matches.append((match.start(), match.end(), match.group()))
+            else:
+                values[kind].append(match.group())
+
+        # Standalone numbers: skip any covered by an amount or date span.
+        # finditer yields spans in position order, so a bisect on the starts
+        # finds the only interval that could contain the number.
+        if number_matches:
+            amount_starts = [s for s, _ in amount_spans]
+            date_starts = [s for s, _ in date_spans]
+            for start, end, text in number_matches:
+                if (_span_covers(amount_spans, amount_starts, start, end) or
+                        _span_covers(date_spans, date_starts, start, end)):
+                    continue
+                values['NUMBER'].append(text)
         
-        # Number pattern (standalone)
-        number_pattern = r'\b\d+(\.\d+)?\b'
-        for match in re.finditer(number_pattern, query_text):
-            # Skip if part of amount or date
-            skip = False
-            for amount in values['AMOUNT']:
-                if match.group() in amount:
-                    skip = True
-                    break
-            if skip:
-                continue
-            for date in values['DATE']:
-                if match.group() in date:
-                    skip = True
-                    break
-            if not skip:
-                values['NUMBER'].append(match.group())
-        
-        # Use NER for named entities if available
-        if self.use_ner and self.nlp:
-            doc = self.nlp(query_text)
+        # Named entities: lexicon automaton when configured, else spaCy NER
+        if self._lexicon is not None:
+            self._collect_lexicon_entities(query_text, values)
+            doc = None
+        elif doc is None:
+            nlp = self._get_nlp()
+            if nlp is not None:
+                doc = nlp(query_text)
+        if doc is not None:
             for ent in doc.ents:
                 if ent.label_ == 'PERSON':
                     values['PERSON'].append(ent.text)
@@ -135,8 +358,7 @@ class PlaceholderMapper:
         
         # Extract button/field names (common in test steps)
         # Look for capitalized words or quoted strings
-        button_pattern = r'["\']([^"\']+)["\']|(?:click|select|press)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
-        for match in re.finditer(button_pattern, query_text, re.IGNORECASE):
+        for match in _BUTTON_RE.finditer(query_text):
             if match.group(1):
                 values['BUTTON'].append(match.group(1))
             elif match.group(2):
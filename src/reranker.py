@@ -1,18 +1,170 @@
 """Reranking module using cross-encoder models."""
+import os
 import numpy as np
+import torch
+from functools import lru_cache
 from typing import List, Tuple, Dict, Any, Optional, Union
 from sentence_transformers import CrossEncoder
 from src.normalizer import NormalizedResult, Normalizer
 
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForSequenceClassification = None
+    AutoTokenizer = None
+
+
+@lru_cache(maxsize=16384)
+def _extract_structured(normalizer: Normalizer, text: str) -> Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Structured fields from re-normalizing a candidate's text.
+
+    The candidate universe is a small fixed set of templates that recur
+    across queries, so the same text would otherwise re-normalize thousands
+    of times. Returns (action_canonical, domain_terms, count_phrases) as
+    hashable tuples.
+    """
+    result = normalizer.normalize(text)
+    return (
+        result.action_canonical,
+        tuple(result.domain_terms or ()),
+        tuple(result.count_phrases or ())
+    )
+
 
 class Reranker:
     """Reranks candidates using cross-encoder models."""
-    
-    def __init__(self, model_name: str, normalizer: Optional[Normalizer] = None):
+
+    def __init__(self, model_name: str, normalizer: Optional[Normalizer] = None,
+                 batch_size: int = 64, max_length: Optional[int] = None,
+                 backend: str = 'pt'):
+        """
+        Args:
+            model_name: Cross-encoder model name from HuggingFace
+            normalizer: Normalizer used for structured candidate formatting
+            batch_size: Pairs per forward pass in predict calls
+            max_length: Truncation length for tokenized pairs (None = model default)
+            backend: 'pt' for the sentence-transformers CrossEncoder, 'onnx'
+                for an ONNX Runtime export via optimum (faster on CPU)
+        """
         self.model_name = model_name
-        self.model = CrossEncoder(model_name)
         self.normalizer = normalizer
-    
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.backend = backend
+
+        if backend == 'onnx':
+            if ORTModelForSequenceClassification is None:
+                raise ImportError(
+                    "backend='onnx' requires optimum[onnxruntime] "
+                    "(pip install 'optimum[onnxruntime]')"
+                )
+            self.model = None
+            self._ort_model = ORTModelForSequenceClassification.from_pretrained(
+                model_name, export=True
+            )
+            self._ort_tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self._score = self._onnx_predict
+        elif backend == 'pt':
+            # Cap intra-op threads: past ~4 the matmuls in MiniLM-class
+            # models stop scaling and extra threads just contend. A single
+            # interop thread avoids oversubscription between ops. Must happen
+            # before the model's first forward pass; torch raises if a
+            # parallel region already ran, in which case keep its settings.
+            try:
+                torch.set_num_threads(min(os.cpu_count() or 1, 4))
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass
+            self.model = CrossEncoder(model_name, max_length=max_length)
+            self._score = self.model.predict
+        else:
+            raise ValueError(f"Unknown reranker backend: {backend}")
+
+    def _onnx_predict(self, pairs: List[List[str]], batch_size: Optional[int] = None,
+                      show_progress_bar: bool = False) -> np.ndarray:
+        """predict() equivalent on the ONNX backend: raw logits per pair."""
+        batch_size = batch_size or self.batch_size
+        scores: List[float] = []
+        for i in range(0, len(pairs), batch_size):
+            batch = pairs[i:i + batch_size]
+            # padding='longest' pads to the batch max, not the model max
+            encoded = self._ort_tokenizer(
+                [p[0] for p in batch], [p[1] for p in batch],
+                padding='longest', truncation=True,
+                max_length=self.max_length, return_tensors='np'
+            )
+            logits = np.asarray(self._ort_model(**encoded).logits)
+            scores.extend(logits.reshape(len(batch), -1)[:, 0].tolist())
+        return np.asarray(scores)
+
+    def _predict_shared_query(self, query_text: str,
+                              candidate_texts: List[str]) -> np.ndarray:
+        """
+        Score one query against many candidates, tokenizing the query once.
+
+        CrossEncoder.predict retokenizes the query inside every pair, which
+        wastes N-1 query tokenizations per rerank call. Here the query ids
+        are computed once and each row is assembled through the tokenizer's
+        own pair builders before calling the underlying model. pt backend
+        only.
+        """
+        tokenizer = self.model.tokenizer
+        model = self.model.model
+        max_length = self.max_length or tokenizer.model_max_length
+
+        # Cap the query at half the budget so an overlong formatted query
+        # cannot push rows past the model's position limit (predict would
+        # have truncated the whole pair longest_first)
+        q_ids = tokenizer(query_text, add_special_tokens=False, truncation=True,
+                          max_length=max_length // 2)['input_ids']
+        num_special = tokenizer.num_special_tokens_to_add(pair=True)
+        cand_budget = max(max_length - len(q_ids) - num_special, 1)
+        cand_ids = tokenizer(candidate_texts, add_special_tokens=False,
+                             truncation=True, max_length=cand_budget)['input_ids']
+
+        # The pair template is model-specific (BERT's [CLS] q [SEP] c [SEP],
+        # XLM-RoBERTa's <s> q </s></s> c </s>, ...), so special tokens and
+        # segment ids come from the tokenizer rather than hand-spliced
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else 0
+        rows = [tokenizer.build_inputs_with_special_tokens(q_ids, ids)
+                for ids in cand_ids]
+        use_token_types = 'token_type_ids' in tokenizer.model_input_names
+        if use_token_types:
+            type_rows = [tokenizer.create_token_type_ids_from_sequences(q_ids, ids)
+                         for ids in cand_ids]
+
+        width = max(len(row) for row in rows)
+        n = len(rows)
+        input_ids = torch.full((n, width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((n, width), dtype=torch.long)
+        token_type_ids = torch.zeros((n, width), dtype=torch.long)
+        for i, row in enumerate(rows):
+            input_ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+            attention_mask[i, :len(row)] = 1
+            if use_token_types:
+                token_type_ids[i, :len(type_rows[i])] = torch.tensor(
+                    type_rows[i], dtype=torch.long)
+
+        activation = getattr(self.model, 'default_activation_function', None)
+        device = next(model.parameters()).device
+        scores = []
+        model.eval()
+        with torch.no_grad():
+            for start in range(0, n, self.batch_size):
+                batch = {
+                    'input_ids': input_ids[start:start + self.batch_size].to(device),
+                    'attention_mask': attention_mask[start:start + self.batch_size].to(device)
+                }
+                if use_token_types:
+                    batch['token_type_ids'] = token_type_ids[start:start + self.batch_size].to(device)
+                logits = model(**batch).logits
+                if activation is not None:
+                    logits = activation(logits)
+                scores.append(logits[:, 0].cpu().numpy())
+        return np.concatenate(scores)
+
     def rerank(self, query: Union[str, NormalizedResult], candidates: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Tuple[Dict[str, Any], float]]:
         """
         Rerank candidates based on query.
@@ -27,34 +179,75 @@ class Reranker:
         """
         if not candidates:
             return []
-        
-        # Prepare pairs for cross-encoder
-        pairs = []
+
         query_text = self._format_query_text(query)
-        for candidate in candidates:
-            candidate_text = self._format_candidate_text(candidate)
-            pairs.append([query_text, candidate_text])
-        
-        # Get scores from cross-encoder
-        scores = self.model.predict(pairs)
-        
-        # Combine candidates with scores
-        scored_candidates = list(zip(candidates, scores))
-        
-        # Sort by score descending
-        scored_candidates.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return top_k if specified
-        if top_k:
-            return scored_candidates[:top_k]
-        
-        return scored_candidates
+        candidate_texts = [self._format_candidate_text(c) for c in candidates]
+
+        # The query repeats in every pair, so on the pt backend it is
+        # tokenized once and spliced onto each candidate encoding; other
+        # backends score (query, candidate) pairs as before
+        if self.backend == 'pt':
+            scores = self._predict_shared_query(query_text, candidate_texts)
+        else:
+            scores = np.asarray(self._score(
+                [[query_text, text] for text in candidate_texts],
+                batch_size=self.batch_size, show_progress_bar=False
+            ))
+
+        # Select top_k with an O(N) partition instead of sorting all N
+        # candidates, then order just the selected few. The stable sorts keep
+        # input order on ties, matching the previous list.sort behaviour.
+        if top_k and top_k < len(scores):
+            idx = np.argpartition(-scores, top_k)[:top_k]
+            idx = idx[np.argsort(-scores[idx], kind='stable')]
+        else:
+            idx = np.argsort(-scores, kind='stable')
+
+        # Python floats at this boundary so downstream code never handles
+        # NumPy scalars
+        return [(candidates[i], float(scores[i])) for i in idx.tolist()]
     
     def rerank_batch(self, queries: List[str], candidates_list: List[List[Dict[str, Any]]], top_k: Optional[int] = None) -> List[List[Tuple[Dict[str, Any], float]]]:
-        """Rerank multiple queries in batch."""
-        results = []
+        """
+        Rerank multiple queries in batch.
+
+        All (query, candidate) pairs are flattened into one model.predict
+        call and the scores sliced back per query afterwards; scoring each
+        query separately pays tokenizer and kernel-dispatch overhead per
+        call and leaves the batch dimension underfilled.
+        """
+        all_pairs = []
+        counts = []
         for query, candidates in zip(queries, candidates_list):
-            results.append(self.rerank(query, candidates, top_k))
+            query_text = self._format_query_text(query)
+            for candidate in candidates:
+                all_pairs.append([query_text, self._format_candidate_text(candidate)])
+            counts.append(len(candidates))
+
+        if all_pairs:
+            # Score pairs in length order so each batch pads to roughly its
+            # own length; a short pair batched with a long one spends most of
+            # the forward pass on padding. Scores are scattered back to input
+            # order afterwards.
+            order = np.argsort([len(q) + len(c) for q, c in all_pairs])
+            scores_sorted = np.asarray(self._score(
+                [all_pairs[i] for i in order],
+                batch_size=self.batch_size, show_progress_bar=False
+            ))
+            unsorted = np.empty(len(all_pairs), dtype=np.float64)
+            unsorted[order] = scores_sorted
+            scores = unsorted.tolist()
+        else:
+            scores = []
+
+        # Split scores back per query, sort, and apply top_k
+        results = []
+        offset = 0
+        for candidates, count in zip(candidates_list, counts):
+            scored_candidates = list(zip(candidates, scores[offset:offset + count]))
+            offset += count
+            scored_candidates.sort(key=lambda x: x[1], reverse=True)
+            results.append(scored_candidates[:top_k] if top_k else scored_candidates)
         return results
 
     def _format_query_text(self, query: Union[str, NormalizedResult]) -> str:
@@ -93,16 +286,19 @@ class Reranker:
             )
             
             if original_text:
-                # Re-normalize to extract structured fields
-                normalized_result = self.normalizer.normalize(original_text)
-                
+                # Re-normalize to extract structured fields (cached: the same
+                # template text shows up across many queries)
+                extr_action, extr_domain, extr_counts = _extract_structured(
+                    self.normalizer, original_text
+                )
+
                 # Use extracted fields if they weren't already present
-                if not action_canon and normalized_result.action_canonical:
-                    action_canon = normalized_result.action_canonical
-                if not domain_terms and normalized_result.domain_terms:
-                    domain_terms = normalized_result.domain_terms
-                if not count_phrases and normalized_result.count_phrases:
-                    count_phrases = normalized_result.count_phrases
+                if not action_canon and extr_action:
+                    action_canon = extr_action
+                if not domain_terms and extr_domain:
+                    domain_terms = extr_domain
+                if not count_phrases and extr_counts:
+                    count_phrases = extr_counts
 
         # Format structured cues
         if action_canon:
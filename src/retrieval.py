@@ -1,7 +1,110 @@
 """Retrieval module for finding matching BDD templates."""
 import numpy as np
-from typing import List, Tuple, Dict, Any, Optional
-from collections import defaultdict
+from typing import Iterable, Iterator, List, Tuple, Dict, Any, Optional
+from collections import namedtuple
+from dataclasses import dataclass, fields
+
+
+# Aggregated per-cluster stats; a namedtuple is cheaper to allocate than the
+# previous 7-key dict and fields are read by attribute
+ClusterInfo = namedtuple(
+    'ClusterInfo',
+    ['cluster_id', 'hybrid_score', 'max_similarity', 'avg_similarity',
+     'cluster_size', 'usage_count', 'candidates']
+)
+
+
+@dataclass(slots=True)
+class Candidate:
+    """
+    One retrieval candidate row as a slotted record.
+
+    Hot loops in the pipeline and reranker read the same handful of fields
+    over and over; slotted attribute access is several times cheaper than
+    dict lookups and the record carries no hash-table overhead. ``get`` and
+    ``[]`` mirror the dict protocol so existing consumers keep working, and
+    ``to_dict`` restores a plain dict for serialization.
+    """
+    id: Optional[int] = None
+    feature_step_id: Optional[int] = None
+    step_type: Optional[str] = None
+    step_text: Optional[str] = None
+    step_text_normalized: Optional[str] = None
+    step_index: Optional[int] = None
+    usage_count: Optional[int] = None
+    cluster_id: Optional[int] = None
+    scenario_id: Optional[int] = None
+    scenario_testcase_id: Optional[str] = None
+    scenario_full_text: Optional[str] = None
+    scenario_name: Optional[str] = None
+    scenario_given_steps: Optional[Any] = None
+    scenario_when_steps: Optional[Any] = None
+    scenario_then_steps: Optional[Any] = None
+    normalized_text: Optional[str] = None
+    bdd_step: Optional[str] = None
+    canonical_template: Optional[str] = None
+    action_canonical: Optional[str] = None
+    domain_terms: Optional[Any] = None
+    count_phrases: Optional[Any] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Candidate":
+        """Build from a DB row dict, ignoring unknown keys."""
+        return cls(**{k: v for k, v in d.items() if k in _CANDIDATE_FIELDS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _CANDIDATE_FIELDS}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+_CANDIDATE_FIELDS = frozenset(f.name for f in fields(Candidate))
+
+
+@dataclass(slots=True)
+class Candidates:
+    """
+    Retrieval results as structure-of-arrays: parallel id/score arrays plus
+    the candidate dicts.
+
+    Keeping scores in one contiguous float buffer lets the rerank-skip
+    analysis slice views instead of rebuilding lists per query. A tuple-style
+    facade (len/iter/index/slice yielding ``(id, score, dict)``) keeps
+    existing consumers working unchanged.
+    """
+    ids: np.ndarray
+    scores: np.ndarray
+    dicts: List[Candidate]
+
+    @classmethod
+    def from_tuples(cls, rows: List[Tuple[int, float, Candidate]]) -> "Candidates":
+        n = len(rows)
+        return cls(
+            ids=np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+            scores=np.fromiter((r[1] for r in rows), dtype=np.float32, count=n),
+            dicts=[r[2] for r in rows]
+        )
+
+    def __len__(self) -> int:
+        return len(self.dicts)
+
+    def __bool__(self) -> bool:
+        return bool(self.dicts)
+
+    def __iter__(self):
+        return zip(self.ids.tolist(), self.scores.tolist(), self.dicts)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return list(zip(self.ids[idx].tolist(), self.scores[idx].tolist(), self.dicts[idx]))
+        return (int(self.ids[idx]), float(self.scores[idx]), self.dicts[idx])
 
 
 class Retrieval:
@@ -11,99 +114,206 @@ class Retrieval:
         self.db = database
         self.config = config
     
-    def retrieve(self, query_embedding: np.ndarray, query_text: str, 
-                 limit: Optional[int] = None, ef_search: Optional[int] = None) -> List[Tuple[int, float, Dict[str, Any]]]:
+    def retrieve(self, query_embedding: np.ndarray, query_text: str,
+                 limit: Optional[int] = None, ef_search: Optional[int] = None) -> Candidates:
         """
         Retrieve candidates using vector search.
-        
+
         Args:
             query_embedding: Query embedding vector
             query_text: Query text (for logging)
             limit: Number of candidates to retrieve
             ef_search: HNSW ef_search parameter
-        
+
         Returns:
-            List of (candidate_id, similarity_score, candidate_dict) tuples
+            Candidates with parallel id/score arrays and candidate dicts
         """
         limit = limit or self.config.retrieval.prefilter_limit
         ef_search = ef_search or self.config.retrieval.ef_search
-        
-        candidates = self.db.vector_search(query_embedding, limit, ef_search)
-        return candidates
+
+        # Convert row dicts to slotted Candidate records at this boundary so
+        # downstream loops use attribute-speed access
+        rows = self.db.vector_search(query_embedding, limit, ef_search)
+        return Candidates.from_tuples(
+            [(row_id, sim, Candidate.from_dict(d)) for row_id, sim, d in rows]
+        )
     
-    def cluster_aggregation(self, candidates: List[Tuple[int, float, Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+    def retrieve_iter(self, query_embedding: np.ndarray, query_text: str,
+                      limit: Optional[int] = None,
+                      ef_search: Optional[int] = None) -> Iterator[Tuple[int, float, Candidate]]:
+        """
+        Streaming variant of retrieve: yield candidates in similarity order.
+
+        Consumers that only need the head of the ranking (e.g. streaming
+        cluster aggregation) can stop early without the full limit-sized list
+        ever being built.
+
+        Args:
+            query_embedding: Query embedding vector
+            query_text: Query text (for logging)
+            limit: Number of candidates to retrieve
+            ef_search: HNSW ef_search parameter
+
+        Yields:
+            (id, similarity, Candidate) tuples in descending similarity order
+        """
+        limit = limit or self.config.retrieval.prefilter_limit
+        ef_search = ef_search or self.config.retrieval.ef_search
+
+        for row_id, sim, d in self.db.vector_search_iter(query_embedding, limit, ef_search):
+            yield (row_id, sim, Candidate.from_dict(d))
+
+    def cluster_aggregation(self, candidates: List[Tuple[int, float, Dict[str, Any]]]) -> Dict[int, ClusterInfo]:
         """
         Aggregate candidates by cluster_id and compute hybrid scores.
-        
+
         Args:
             candidates: List of (id, similarity, candidate_dict) tuples
-        
+
         Returns:
-            Dictionary mapping cluster_id to aggregated cluster info
+            Dictionary mapping cluster_id to aggregated ClusterInfo
         """
-        cluster_scores = defaultdict(list)
-        cluster_candidates = defaultdict(list)
-        
-        for candidate_id, similarity, candidate_dict in candidates:
-            cluster_id = candidate_dict.get('cluster_id')
-            if cluster_id is not None:
-                cluster_scores[cluster_id].append(similarity)
-                cluster_candidates[cluster_id].append((candidate_id, similarity, candidate_dict))
-        
-        # Compute hybrid scores for each cluster
+        clustered = [c for c in candidates if c[2].get('cluster_id') is not None]
+        if not clustered:
+            return {}
+
+        n = len(clustered)
+        cluster_ids = np.fromiter((c[2]['cluster_id'] for c in clustered),
+                                  dtype=np.int64, count=n)
+        sims = np.fromiter((c[1] for c in clustered), dtype=np.float64, count=n)
+
+        # Group by cluster with a stable argsort so input order is preserved
+        # within each cluster (usage_count reads the first-seen candidate),
+        # then reduce max/sum per group in C instead of per-candidate Python
+        order = np.argsort(cluster_ids, kind='stable')
+        sorted_cids = cluster_ids[order]
+        sorted_sims = sims[order]
+        starts = np.concatenate(([0], np.nonzero(np.diff(sorted_cids))[0] + 1))
+        sizes = np.diff(np.append(starts, n))
+        max_sims = np.maximum.reduceat(sorted_sims, starts)
+        avg_sims = np.add.reduceat(sorted_sims, starts) / sizes
+
         cluster_info = {}
-        for cluster_id, similarities in cluster_scores.items():
-            max_similarity = max(similarities)
-            avg_similarity = np.mean(similarities)
-            cluster_size = len(similarities)
-            usage_count = cluster_candidates[cluster_id][0][2].get('usage_count', 0)
-            
+        order_list = order.tolist()
+        for g, start in enumerate(starts.tolist()):
+            size = int(sizes[g])
+            members = [clustered[i] for i in order_list[start:start + size]]
+            cluster_id = members[0][2]['cluster_id']
+            usage_count = members[0][2].get('usage_count', 0)
+
             # Hybrid score: 60% max similarity, 20% cluster popularity, 20% lexical (not computed here)
             cluster_popularity_score = min(usage_count / 100.0, 1.0)  # Normalize to 0-1
             hybrid_score = (
-                0.6 * max_similarity +
+                0.6 * max_sims[g] +
                 0.2 * cluster_popularity_score +
-                0.2 * avg_similarity  # Using avg as proxy for lexical
+                0.2 * avg_sims[g]  # Using avg as proxy for lexical
+            )
+
+            cluster_info[cluster_id] = ClusterInfo(
+                cluster_id=cluster_id,
+                hybrid_score=float(hybrid_score),
+                max_similarity=float(max_sims[g]),
+                avg_similarity=float(avg_sims[g]),
+                cluster_size=size,
+                usage_count=usage_count,
+                candidates=members
             )
-            
-            cluster_info[cluster_id] = {
-                'cluster_id': cluster_id,
-                'hybrid_score': hybrid_score,
-                'max_similarity': max_similarity,
-                'avg_similarity': avg_similarity,
-                'cluster_size': cluster_size,
-                'usage_count': usage_count,
-                'candidates': cluster_candidates[cluster_id]
-            }
-        
+
         return cluster_info
-    
-    def get_best_cluster_candidate(self, cluster_info: Dict[int, Dict[str, Any]]) -> Optional[Tuple[int, float, Dict[str, Any]]]:
+
+    def cluster_aggregation_stream(self, candidate_iter: Iterable[Tuple[int, float, Any]]) -> Dict[int, ClusterInfo]:
+        """
+        Aggregate clusters from a similarity-ordered candidate stream with a
+        heuristic early stop on the low-similarity tail.
+
+        Candidates arrive sorted descending by similarity (as yielded by
+        retrieve_iter). A cluster first seen at similarity s can score at
+        most 0.6*s + 0.2 + 0.2*s, so the scan stops once that ceiling drops
+        below the best per-member hybrid snapshot seen so far. That snapshot
+        is a peak, not a final score — an accumulated cluster's hybrid decays
+        as lower-similarity members arrive — so the cutoff is an
+        approximation, not a sound bound: when cluster score spreads are
+        large, the streamed result can pick a different winner than full
+        cluster_aggregation. Intended for get_best_cluster_candidate where
+        that trade-off is acceptable; the returned dict covers only the
+        clusters seen before the cutoff.
+
+        Args:
+            candidate_iter: Iterable of (id, similarity, candidate_dict)
+                tuples in descending similarity order
+
+        Returns:
+            Dictionary mapping cluster_id to aggregated ClusterInfo
+        """
+        # cluster_id -> [max_sim, sum_sim, usage_count, members]
+        acc: Dict[int, list] = {}
+        best_hybrid = float('-inf')
+
+        for candidate in candidate_iter:
+            similarity = candidate[1]
+            # Heuristic cutoff: best_hybrid holds peak snapshots, which can
+            # overstate final scores (see docstring)
+            if 0.6 * similarity + 0.2 + 0.2 * similarity < best_hybrid:
+                break
+
+            candidate_dict = candidate[2]
+            cluster_id = candidate_dict.get('cluster_id')
+            if cluster_id is None:
+                continue
+
+            entry = acc.get(cluster_id)
+            if entry is None:
+                # First-seen candidate fixes max_sim (descending order) and
+                # usage_count, matching cluster_aggregation
+                entry = acc[cluster_id] = [
+                    similarity, 0.0, candidate_dict.get('usage_count', 0), []
+                ]
+            entry[1] += similarity
+            entry[3].append(candidate)
+
+            hybrid = (
+                0.6 * entry[0] +
+                0.2 * min(entry[2] / 100.0, 1.0) +
+                0.2 * entry[1] / len(entry[3])
+            )
+            if hybrid > best_hybrid:
+                best_hybrid = hybrid
+
+        cluster_info = {}
+        for cluster_id, (max_sim, sum_sim, usage_count, members) in acc.items():
+            size = len(members)
+            avg_sim = sum_sim / size
+            cluster_popularity_score = min(usage_count / 100.0, 1.0)
+            cluster_info[cluster_id] = ClusterInfo(
+                cluster_id=cluster_id,
+                hybrid_score=0.6 * max_sim + 0.2 * cluster_popularity_score + 0.2 * avg_sim,
+                max_similarity=max_sim,
+                avg_similarity=avg_sim,
+                cluster_size=size,
+                usage_count=usage_count,
+                candidates=members
+            )
+        return cluster_info
+
+    def get_best_cluster_candidate(self, cluster_info: Dict[int, ClusterInfo]) -> Optional[Tuple[int, float, Dict[str, Any]]]:
         """
         Get the best candidate from the best cluster.
-        
+
         Args:
             cluster_info: Dictionary from cluster_aggregation
-        
+
         Returns:
             Best (candidate_id, score, candidate_dict) tuple or None
         """
         if not cluster_info:
             return None
-        
-        # Sort clusters by hybrid score
-        sorted_clusters = sorted(cluster_info.items(), key=lambda x: x[1]['hybrid_score'], reverse=True)
-        
-        if not sorted_clusters:
-            return None
-        
-        # Get best candidate from best cluster
-        best_cluster_id, best_cluster_info = sorted_clusters[0]
-        best_candidates = best_cluster_info['candidates']
-        
+
+        # Only the winners matter, so two linear max() scans replace the full
+        # sorts of the clusters and of the winning cluster's candidates
+        best_cluster_info = max(cluster_info.values(), key=lambda c: c.hybrid_score)
+
         # Return candidate with highest similarity
-        best_candidates.sort(key=lambda x: x[1], reverse=True)
-        return best_candidates[0]
+        return max(best_cluster_info.candidates, key=lambda x: x[1])
 
 
 